@@ -2,6 +2,7 @@
 
 from loguru import logger
 from pathlib import Path
+import threading
 import traceback
 import subprocess
 from ..util.file import file_dump, CACHE_DIR
@@ -12,6 +13,8 @@ from ..util import settings
 LINTER_CACHED_FILE = CACHE_DIR / "linter_cache.py"
 FILE_STR = str(LINTER_CACHED_FILE)
 FILE_STR_LEN = len(FILE_STR) + 1  # Include the ":" after the file name
+# The cached file is shared, linting may be called from worker threads
+LINT_TEXT_LOCK = threading.Lock()
 
 
 class _Linter:
@@ -58,14 +61,15 @@ def lint_path(path: Path, *, capture_output: bool = True) -> str:
 
 def lint_text(code: str, *args, **kwargs) -> list[CodeError]:
     """Run flake8 on a piece of unsaved code."""
-    file_dump(LINTER_CACHED_FILE, code)
-    try:
-        r = lint_path(LINTER_CACHED_FILE, *args, **kwargs)
-    except Exception as e:
-        logger.warning("".join(traceback.format_exception(e)))
-        logger.warning("Failed to run linter, see traceback above.")
-        return []
-    LINTER_CACHED_FILE.unlink(missing_ok=True)
+    with LINT_TEXT_LOCK:
+        file_dump(LINTER_CACHED_FILE, code)
+        try:
+            r = lint_path(LINTER_CACHED_FILE, *args, **kwargs)
+        except Exception as e:
+            logger.warning("".join(traceback.format_exception(e)))
+            logger.warning("Failed to run linter, see traceback above.")
+            return []
+        LINTER_CACHED_FILE.unlink(missing_ok=True)
     results = []
     append = results.append
     for line in r.split("\n"):
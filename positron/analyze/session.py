@@ -4,6 +4,7 @@ from loguru import logger
 from typing import Optional
 from itertools import islice
 from pathlib import Path
+import threading
 import traceback
 import re
 import json
@@ -113,6 +114,8 @@ class Session:
             logger.info("\n".join(f"  {v.executable}" for v in all_venvs))
             env_path = all_venvs[-1].executable
         self.env_path = Path(env_path).expanduser().resolve()
+        # Jedi is not thread safe, calls may come from worker threads
+        self._jedi_lock = threading.Lock()
         self.dir_tree = DirectoryTree(self.project_path)
         self._project = jedi.Project(
             str(self.project_path),
@@ -133,21 +136,27 @@ class Session:
         fuzzy: bool = False,
     ) -> list[str]:
         """List of strings to complete code under the cursor."""
-        script = jedi.Script(code=code, path=path, project=self._project)
-        try:
-            completions = script.complete(line, col, fuzzy=fuzzy)
-        except Exception as e:
-            logger.warning(f"get_completions exception: {e}")
-            return []
-        return islice(completions, max_completions)
+        with self._jedi_lock:
+            script = jedi.Script(code=code, path=path, project=self._project)
+            try:
+                completions = script.complete(line, col, fuzzy=fuzzy)
+            except Exception as e:
+                logger.warning(f"get_completions exception: {e}")
+                return []
+            return list(islice(completions, max_completions))
 
     def get_context(self, path: Path, code: str, line: int, col: int):
-        script = jedi.Script(code=code, path=path, project=self._project)
-        return script.get_context(line, col)
+        with self._jedi_lock:
+            script = jedi.Script(code=code, path=path, project=self._project)
+            return script.get_context(line, col)
 
     def get_info(self, path: Path, code: str, line: int, col: int) -> str:
         """Multiline string of code analysis under the cursor."""
         logger.debug(f"Getting info for: {path} :: {line},{col}")
+        with self._jedi_lock:
+            return self._get_info(path, code, line, col)
+
+    def _get_info(self, path: Path, code: str, line: int, col: int) -> str:
         script = jedi.Script(code=code, path=path, project=self._project)
         debug_strs = []
         strs = []
@@ -207,14 +216,15 @@ class Session:
         yield from self._project.search(string, all_scopes=exhaustive)
 
     def get_errors(self, code: str) -> list[CodeError]:
-        script = jedi.Script(code=code, project=self._project)
         errors = []
         append = errors.append
         # Syntax errors from jedi
-        for e in script.get_syntax_errors():
-            msg = e.get_message()
-            _, __, msg = msg.partition("Error: ")
-            append(CodeError(msg, e.line, e.column))
+        with self._jedi_lock:
+            script = jedi.Script(code=code, project=self._project)
+            for e in script.get_syntax_errors():
+                msg = e.get_message()
+                _, __, msg = msg.partition("Error: ")
+                append(CodeError(msg, e.line, e.column))
         # Linter errors
         linter_errors = lint_text(code)
         errors.extend(linter_errors)
@@ -289,12 +299,15 @@ class Session:
         return str(p)
 
     @staticmethod
-    def get_path_icon(p: Path, /) -> str:
+    def get_path_icon(p: Path, /, is_dir: Optional[bool] = None) -> str:
+        """Icon for a path. Pass *is_dir* if known to avoid checking the disk."""
         if ".git" in p.name:
             return ""
         if "LICENSE" in p.name:
             return ""
-        if p.is_dir():
+        if is_dir is None:
+            is_dir = p.is_dir()
+        if is_dir:
             return "" if p == Path.home() else ""
         return FILE_TYPE_ICONS.get(p.suffix, "")
 
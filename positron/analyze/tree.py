@@ -1,6 +1,7 @@
 """Directory tree indexing of structure and contents."""
 
 from loguru import logger
+from typing import Optional
 from pathlib import Path
 import os.path
 import re
@@ -11,7 +12,9 @@ from ..util.time import pingpong, pong
 from ..util import settings
 
 
-FILE_TYPES = set((f".{ft}" if ft else ft) for ft in settings.get("project.file_types"))
+FILE_TYPES = frozenset(
+    (f".{ft}" if ft else ft) for ft in settings.get("project.file_types")
+)
 IGNORE_MATCHES = settings.get("project.ignore_names")
 RE_IGNORE_PATHS = re.compile("|".join(IGNORE_MATCHES)) if IGNORE_MATCHES else None
 INDEX_TIMEOUT_MS = settings.get("project.indexing_timeout") * 1000
@@ -37,6 +40,9 @@ class DirectoryTree:
         self._cache = {self.root: _CachedDir(self.root)}
         self._all_paths = {self.root}
         self._sorted_tree = [self.root]
+        self._sorted_files: tuple[Path, ...] = ()
+        self._files_set: frozenset[Path] = frozenset()
+        self._sorted_rel_lower: Optional[list[str]] = None
         self.last_modified = -1
         self.reindex()
 
@@ -44,6 +50,25 @@ class DirectoryTree:
     def all_paths(self):
         return self._sorted_tree
 
+    @property
+    def all_files(self) -> tuple[Path, ...]:
+        """Like `all_paths` but without folders, updated only when reindexing."""
+        return self._sorted_files
+
+    def is_file(self, path: Path) -> bool:
+        """If *path* was indexed as a file, without accessing the disk."""
+        return path in self._files_set
+
+    @property
+    def all_paths_rel_lower(self) -> list[str]:
+        """Lowercase strings of `all_paths` relative to root, in the same order."""
+        if self._sorted_rel_lower is None:
+            root = self.root
+            self._sorted_rel_lower = [
+                str(p.relative_to(root)).lower() for p in self._sorted_tree
+            ]
+        return self._sorted_rel_lower
+
     def print_tree(self, *args):
         for p in self._sorted_tree:
             print(p.relative_to(self.root))
@@ -56,7 +81,7 @@ class DirectoryTree:
         if prev_count != new_count:
             logger.debug(f"  --> {new_count} items")
 
-    def __full_reindex(self, p: float):
+    def __full_reindex(self, p: int):
         _cache = self._cache
         _all_paths = self._all_paths
         require_sort = False
@@ -103,7 +128,17 @@ class DirectoryTree:
                 # Check any potentially new folders
                 check_dirs |= set(folders)
         if require_sort:
-            self._sorted_tree = sorted(_all_paths, key=self.sort_folders_key)
+            # Every existing folder has a cache entry after a full reindex, so
+            # files and folders can be told apart without accessing the disk
+            def sort_key(c: Path) -> tuple:
+                if c in _cache:
+                    return 0, 0, str(c)
+                return 1, len(c.parents), str(c)
+
+            self._sorted_tree = sorted(_all_paths, key=sort_key)
+            self._sorted_files = tuple(p for p in self._sorted_tree if p not in _cache)
+            self._files_set = frozenset(self._sorted_files)
+            self._sorted_rel_lower = None
 
     @classmethod
     def get_children_from_disk(
@@ -112,13 +147,11 @@ class DirectoryTree:
         use_file_types: bool = True,
         use_path_filter: bool = True,
     ) -> list[Path]:
-        file_types = FILE_TYPES if use_file_types else []
-        children = yield_children(path, file_types=file_types)
-        if use_path_filter and RE_IGNORE_PATHS is not None:
-            children = filter(
-                lambda p: RE_IGNORE_PATHS.search(str(p)) is None,
-                children,
-            )
+        file_types = FILE_TYPES if use_file_types else None
+        # Ignored paths are pruned before anything else, so that ignored folders
+        # are never descended into and ignored files are never stat'ed
+        ignore = RE_IGNORE_PATHS if use_path_filter else None
+        children = yield_children(path, file_types=file_types, ignore=ignore)
         return sorted(children, key=cls.sort_folders_key)
 
     def get_children(self, path: Path, /) -> tuple[Path, ...]:
@@ -136,11 +169,8 @@ class DirectoryTree:
         return "/".join(parts)
 
     @staticmethod
-    def sort_folders_key(c: Path) -> str:
+    def sort_folders_key(c: Path) -> tuple:
         """Key function for sorting paths in a tree with folders first."""
-        primary_sort = 0
-        file_sort = "000"
         if c.is_file():
-            primary_sort = 1
-            file_sort = f"{len(c.parents):0>3}"
-        return f"{primary_sort}{file_sort}{c}"
+            return 1, len(c.parents), str(c)
+        return 0, 0, str(c)
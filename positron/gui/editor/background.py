@@ -0,0 +1,37 @@
+"""Running editor work off the main thread."""
+
+from typing import Callable
+from concurrent.futures import ThreadPoolExecutor, Future
+from .. import kex as kx
+
+
+# Shared by all editor widgets, jedi calls are serialized by the session anyway
+EXECUTOR = ThreadPoolExecutor(max_workers=2, thread_name_prefix="editor")
+
+
+def submit_to_main(
+    executor: ThreadPoolExecutor,
+    fn: Callable,
+    args: tuple,
+    on_result: Callable,
+    is_current: Callable[[], bool],
+) -> Future:
+    """Call `fn(*args)` in the executor and pass the result to `on_result`.
+
+    The result is applied in the main thread, and is discarded if `is_current`
+    returns False by then. Returns the future so that it can be cancelled.
+    """
+    def on_done(future: Future):
+        # Called from the worker thread
+        if future.cancelled():
+            return
+
+        def apply(*args):
+            if is_current():
+                on_result(future.result())
+
+        kx.schedule_once(apply)
+
+    future = executor.submit(fn, *args)
+    future.add_done_callback(on_done)
+    return future
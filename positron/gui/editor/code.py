@@ -3,24 +3,28 @@
 from loguru import logger
 from typing import Optional
 import traceback
-import re
-import os.path
+import os
+from collections import deque
+from concurrent.futures import Future
+from functools import partial
+from operator import attrgetter
 import arrow
 from pathlib import Path
 from pygments.util import ClassNotFound as LexerClassNotFound
-from pygments.styles import STYLE_MAP
 from pygments.lexers import get_lexer_for_filename
-from pygments.lexers.markup import MarkdownLexer
 from jedi.api.classes import Completion
 from .. import kex as kx, FONT_KW, UI_FONT_KW, CHAR_WIDTH, LINE_HEIGHT
 from ...util import settings
-from ...util.file import file_load, file_dump
+from ...util.file import file_load, file_dump_atomic
 from ...util.snippets import find_snippets, Snippet
+from .background import EXECUTOR, submit_to_main
 
 
-logger.info(f"Available styles: {list(STYLE_MAP.keys())}")
 MAX_COMPLETIONS = 10
-COMPLETION_DISABLE_AFTER = set(" \t\n\r!#$%&()*+,-/:;<=>?@[\]^{|}~")  # noqa: W605
+COMPLETIONS_CACHE_SIZE = 4
+MAX_WORD_LENGTH = 1_000
+COMPLETION_DISABLE_AFTER = frozenset(" \t\n\r!#$%&()*+,-/:;<=>?@[\]^{|}~")  # noqa: W605
+_LEXER_CLASSES: dict[str, type] = {}
 STATUS_FONT_KW = dict(
     font_name=UI_FONT_KW["font_name"],
     font_size=FONT_KW["font_size"],
@@ -29,6 +33,20 @@ STATUS_FONT_KW = dict(
 )
 
 
+def _get_lexer(file: Path):
+    # Lexer classes are cached by name, instances are not shared between editors
+    lexer_cls = _LEXER_CLASSES.get(file.name)
+    if lexer_cls is None:
+        try:
+            lexer_cls = type(get_lexer_for_filename(file.name))
+        except LexerClassNotFound:
+            # Deferred since the markup module imports many other lexers
+            from pygments.lexers.markup import MarkdownLexer
+            lexer_cls = MarkdownLexer
+        _LEXER_CLASSES[file.name] = lexer_cls
+    return lexer_cls()
+
+
 def _timestamp():
     return arrow.now().format("HH:mm:ss")
 
@@ -47,8 +65,6 @@ def _format_humanized(a: arrow.Arrow, /) -> str:
 
 
 class CodeEditor(kx.Anchor):
-    _cached_code_completions = kx.ListProperty([])
-
     def __init__(self, session, uid: int, file: Path):
         super().__init__()
         self.session = session
@@ -56,14 +72,29 @@ class CodeEditor(kx.Anchor):
         assert isinstance(file, Path)
         self._current_file = file.expanduser().resolve()
         self.__gutter_width = 3  # Any int, should be updated with settings refresh
+        self.__gutter_format = "{!s:>3.3}".format  # Must match gutter width
+        self.__gutter_blob = ""  # Newline-terminated fixed-width line numbers
         self.__max_line_width = 1  # Any int, should be updated with settings refresh
         self.__disk_modified_time: Optional[arrow.Arrow] = None
+        self.__disk_modified_ns: Optional[int] = None
+        self.__disk_modified_repr = ""
         self.__disk_diff = False
+        self.__disk_diff_stale = False
         self.__disk_cache = None
+        self.__cached_path_repr: Optional[tuple[str, str]] = None
         self.__find_text = ""
         self.__errors = []
         self.__last_errors_hash = None
+        self.__errors_request = 0
+        self.__errors_future: Optional[Future] = None
         self.__cached_selected_text = ""
+        self._cached_code_completions: deque = deque()
+        self.__completion_lines: deque[str] = deque()
+        self.__completions_cache: dict[tuple, list[Completion]] = {}
+        self.__completions_request = 0
+        self.__completions_future: Optional[Future] = None
+        self.__context_request = 0
+        self.__context_future: Optional[Future] = None
         self.__status_bg = kx.XColor(*settings.get("ui.status.normal"))
         self.__status_bg_warn = kx.XColor(*settings.get("ui.status.warn"))
         self.__status_bg_error = kx.XColor(*settings.get("ui.status.error"))
@@ -111,7 +142,7 @@ class CodeEditor(kx.Anchor):
         self.status_bar_errors.set_size(y=LINE_HEIGHT)
         self.status_bar_errors.add(self.status_errors)
         self.__update_errors_trigger = kx.snoozing_trigger(
-            self.update_errors,
+            self._update_errors_background,
             settings.get("editor.error_check_cooldown"),
         )
         # Assemble
@@ -139,39 +170,17 @@ class CodeEditor(kx.Anchor):
         completion_layout.add(self.completion_label)
         self.completion_modal = kx.Modal(container=self, name="Completion popup")
         self.completion_modal.add(completion_layout)
+        self._trigger_completions_label = kx.create_trigger(
+            self._refresh_completions_label,
+        )
         self.code_entry.bind(
             on_cursor_pause=self._on_cursor_pause,
             cursor_pos=self._on_cursor_pos,
         )
-        self.bind(_cached_code_completions=self._on_cached_code_completions)
         # Controls
         self.set_focus = self.code_entry.set_focus
-        for reg_args in [
-            ("Open settings", self._open_settings, "f11"),
-            ("Reload", self.reload, "^ l"),
-            ("Save", self.save, "^ s"),
-            ("Delete file", self.delete_file, "^+ delete"),
-            ("Duplicate lines", self.code_entry.duplicate, "^+ d", True),
-            ("Shift lines up", lambda: self.code_entry.shift_lines(-1), "!+ up", True),
-            (
-                "Shift lines down",
-                lambda: self.code_entry.shift_lines(1),
-                "!+ down",
-                True,
-            ),
-            ("Find next", self.find_next, "^ ]", True),
-            ("Find previous", self.find_prev, "^ [", True),
-            ("Complete code", self._do_complete, "! enter"),
-            ("Scroll up code comps", self._scroll_up_completions, "! up", True),
-            ("Scroll down code comps", self._scroll_down_completions, "! down", True),
-            ("Next error", self.scroll_to_error, "^ e", True),
-            ("Comment", self.make_comment, "^ \\"),
-            ("Toggle case", self.code_entry.toggle_case, "^ u"),
-            ("Join/split lines", self.code_entry.join_split_lines, "^ j"),
-            ("Join/split lines to len", self._join_split_lines_len, "^+ j"),
-
-        ]:
-            self.im.register(*reg_args)
+        for name, callback_name, *reg_args in self._hotkeys:
+            self.im.register(name, attrgetter(callback_name)(self), *reg_args)
         # Bind to settings
         self._do_trigger_refresh_settings = kx.create_trigger(self._refresh_settings)
         for setting_name in self._refresh_settings_bound_names:
@@ -179,10 +188,6 @@ class CodeEditor(kx.Anchor):
         self._trigger_refresh_settings()
         if settings.get("editor.auto_load"):
             self.load()
-        self.__disk_diff_ev = kx.schedule_interval(
-            self._check_disk_diff,
-            settings.get("editor.disk_diff_interval"),
-        )
 
     # File management
     @property
@@ -195,11 +200,13 @@ class CodeEditor(kx.Anchor):
         self._current_file = file
         text = self.code_entry.text
         file.parent.mkdir(parents=True, exist_ok=True)
-        file_dump(file, text)
+        file_dump_atomic(file, text)
         logger.info(f"Saved  @ {_timestamp()} to: {file}")
-        self.__disk_modified_time = self._get_disk_mod_date(self._current_file)
+        self.__cached_path_repr = None
+        self._set_disk_modified(self._get_disk_stat(file))
         self.__disk_cache = text
         self.__disk_diff = False
+        self.__disk_diff_stale = False
         self._on_cursor()
 
     def load(
@@ -212,14 +219,16 @@ class CodeEditor(kx.Anchor):
     ):
         if file is None:
             file = self._current_file
-        if file.exists():
-            fsize_kb = file.stat().st_size / 2**10
+        stat = self._get_disk_stat(file)
+        if stat is not None:
+            fsize_kb = stat.st_size / 2**10
             if fsize_kb > settings.get("editor.max_file_size_kb"):
                 logger.warning(
                     f"Cannot open {file} due to large size: {fsize_kb:.2f} KB"
                 )
                 return
         self._current_file = file
+        self.__cached_path_repr = None
         self._update_lexer()
         text = self._get_disk_content(file)
         if text:
@@ -227,7 +236,7 @@ class CodeEditor(kx.Anchor):
         else:
             text = ""
             logger.info(f"New unsaved file: {file}")
-        self.__disk_modified_time = self._get_disk_mod_date(file)
+        self._set_disk_modified(stat)
         self.__disk_cache = text
         self.__disk_diff = False
         old_cursor = self.code_entry.cursor
@@ -261,30 +270,50 @@ class CodeEditor(kx.Anchor):
             pass
         return None
 
-    def _get_disk_mod_date(self, file: Path):
-        return arrow.get(os.path.getmtime(file)) if file.exists() else None
+    def _get_disk_stat(self, file: Path) -> Optional[os.stat_result]:
+        try:
+            return file.stat()
+        except OSError:
+            return None
 
-    def _check_disk_diff(self, *args):
-        if not self._current_file.exists():
+    def _set_disk_modified(self, stat: Optional[os.stat_result]):
+        if stat is None:
             self.__disk_modified_time = None
+            self.__disk_modified_ns = None
+        else:
+            self.__disk_modified_time = arrow.get(stat.st_mtime)
+            self.__disk_modified_ns = stat.st_mtime_ns
+        self._refresh_disk_modified_repr()
+
+    def _refresh_disk_modified_repr(self):
+        modified = ""
+        if self.__disk_modified_time:
+            modified = _format_humanized(self.__disk_modified_time)
+        self.__disk_modified_repr = modified
+
+    def check_disk_diff(self, *args):
+        """Check if the file on disk differs from the editor's text."""
+        stat = self._get_disk_stat(self._current_file)
+        if stat is None:
+            self._set_disk_modified(None)
             self.__disk_cache = None
             self.__disk_diff = True
         else:
             # Update disk cache if file has changed on disk
-            modified_time = self._get_disk_mod_date(self._current_file)
-            if modified_time != self.__disk_modified_time:
+            if stat.st_mtime_ns != self.__disk_modified_ns:
                 self.__disk_cache = self._get_disk_content(self._current_file)
-                self.__disk_modified_time = modified_time
+                self._set_disk_modified(stat)
+                self.__disk_diff_stale = True
                 # logger.info(f"Cached @ {_timestamp()} for: {self._current_file}")
-            self.__disk_diff = self.__disk_cache != self.code_entry.text
+            # Full text comparison only if text or disk changed since last check
+            if self.__disk_diff_stale:
+                self.__disk_diff = self.__disk_cache != self.code_entry.text
+                self.__disk_diff_stale = False
+            self._refresh_disk_modified_repr()
         self._refresh_status_diff()
 
     def _update_lexer(self):
-        try:
-            lexer = get_lexer_for_filename(self._current_file.name)
-        except LexerClassNotFound:
-            lexer = MarkdownLexer()
-        self.code_entry.lexer = lexer
+        self.code_entry.lexer = _get_lexer(self._current_file)
 
     def _open_settings(self):
         self.load(settings.SETTINGS_FILE)
@@ -307,20 +336,24 @@ class CodeEditor(kx.Anchor):
         return self.__cached_selected_text
 
     def find_next(self, text: Optional[str] = None):
+        code = self.code_entry
         if text is not None:
             self.__find_text = text
-        self.code_entry.focus = True
-        self.code_entry.find_next(self.__find_text)
+        if not code.focus:
+            code.focus = True
+        code.find_next(self.__find_text)
 
     def find_prev(self, text: Optional[str] = None):
-        self.code_entry.focus = True
+        code = self.code_entry
         if text is not None:
             self.__find_text = text
-        self.code_entry.find_prev(self.__find_text)
+        if not code.focus:
+            code.focus = True
+        code.find_prev(self.__find_text)
 
     def _do_complete(self):
         code = self.code_entry
-        if not self.completion_modal.parent:
+        if not self.completion_modal.parent or not self._cached_code_completions:
             self._find_code_completions()
         comps = self._cached_code_completions
         if not comps:
@@ -353,23 +386,17 @@ class CodeEditor(kx.Anchor):
             start, end = final_cidx - select, final_cidx
             kx.schedule_once(lambda *a: code.select_text(start, end), 0)
 
-    def _get_last_word(self, text=None):
+    def _get_last_word(self, text=None, end=None):
         if text is None:
-            text = self.code_entry.text[:self.code_entry.cursor_index()]
-        if not text:
-            return ""
-        full_len = len(text)
-        idx = min(10, full_len)
-        whitespaces = list(re.finditer(r'[\s]+', text[full_len - idx:]))
-        while True:
-            partial_text = text[full_len - idx:]
-            whitespaces = list(re.finditer(r'[\s]+', partial_text))
-            if whitespaces:
-                last_ws = whitespaces[-1].end()
-                return partial_text[last_ws:]
-            idx *= 2
-            if idx > full_len:
-                return text
+            text = self.code_entry.text
+            end = self.code_entry.cursor_index()
+        elif end is None:
+            end = len(text)
+        limit = max(0, end - MAX_WORD_LENGTH)
+        start = end
+        while start > limit and not text[start - 1].isspace():
+            start -= 1
+        return text[start:end]
 
     def scroll_to_error(self):
         self.update_errors()
@@ -382,68 +409,120 @@ class CodeEditor(kx.Anchor):
 
     # Events
     def _on_cursor(self, *a):
+        # Invalidate pending completions from the background
+        self.__completions_request += 1
+        if self.__completions_future is not None:
+            self.__completions_future.cancel()
         self._refresh_status_diff()
         self.completion_modal.dismiss()
         kx.schedule_once(self._refresh_context)
 
     def _on_cursor_pause(self, *args):
         self._refresh_status_errors()
-        self._find_code_completions()
+        self._find_code_completions(background=True)
         self.completion_modal.open()
 
-    def _find_code_completions(self, *args):
-        self._cached_code_completions = []
+    def _find_code_completions(self, *args, background: bool = False):
+        """Find completions, optionally getting code completions in the background.
+
+        Background results are discarded if the cursor or text changes before they
+        arrive.
+        """
+        self.__completions_request += 1
         code = self.code_entry
         if code.selection_text:
+            self._set_code_completions([])
             return
         code_text = code.text
-        line, col = self.cursor
         cidx = code.cursor_index()
-        last_word = self._get_last_word(code_text[:cidx])
-        # Code completion
         last_char = code_text[cidx-1:cidx]
-        if not last_char:
+        if not last_char or last_char in COMPLETION_DISABLE_AFTER:
+            self._set_code_completions([])
             return
-        if last_char in COMPLETION_DISABLE_AFTER:
-            return
-        comps = self.session.get_completions(
-            self.file,
-            code_text,
-            line,
-            col,
-            MAX_COMPLETIONS,
-            fuzzy=True,
-        )
-        comps = [
-            c for c in comps
-            if c.name != last_word[-len(c.name):]
-        ]
-        # Snippets
-        snips = []
-        if last_word:
-            snips = list(find_snippets(last_word))
-        self._cached_code_completions = snips + comps
-
-    def _on_cached_code_completions(self, w, comps):
-        text_lines = []
-        for c in reversed(comps):
-            if isinstance(c, Snippet):
-                text_lines.append(f"¬ {c.name}")
-            elif isinstance(c, Completion):
-                text_lines.append(c.name)
-            else:
-                raise ValueError(f"Unknown completion type: {c!r}")
-        self.completion_label.text = "\n".join(text_lines)
+        line, col = self.cursor
+        last_word = self._get_last_word(code_text, cidx)
+        # Cache is cleared whenever the text changes, see `_on_text`
+        key = self.file, line, col
+        comps = self.__completions_cache.get(key)
+        if comps is None:
+            get_comps = partial(
+                self.session.get_completions,
+                self.file,
+                code_text,
+                line,
+                col,
+                MAX_COMPLETIONS,
+                fuzzy=True,
+            )
+            if background:
+                self._set_code_completions([])
+                # Snippets are filtered along with completions, off the main thread
+                if self.__completions_future is not None:
+                    self.__completions_future.cancel()
+                request = self.__completions_request
+                self.__completions_future = submit_to_main(
+                    EXECUTOR,
+                    _get_completions_and_snippets,
+                    (get_comps, last_word),
+                    partial(self._on_completions_result, key, last_word),
+                    lambda: request == self.__completions_request,
+                )
+                return
+            comps = get_comps()
+        self._apply_code_completions(key, last_word, comps)
+
+    def _on_completions_result(self, key: tuple, last_word: str, result: tuple):
+        comps, snips = result
+        self._apply_code_completions(key, last_word, comps, snips)
+
+    def _apply_code_completions(
+        self,
+        key: tuple,
+        last_word: str,
+        comps: list[Completion],
+        snips: Optional[list[Snippet]] = None,
+    ):
+        cache = self.__completions_cache
+        if key not in cache:
+            if len(cache) >= COMPLETIONS_CACHE_SIZE:
+                del cache[next(iter(cache))]
+            cache[key] = comps
+        comps = [c for c in comps if not last_word.endswith(c.name)]
+        if snips is None:
+            snips = _find_word_snippets(last_word)
+        lines = [s.preview for s in snips]
+        lines.extend(c.name for c in comps)
+        self._set_code_completions(snips + comps, lines)
+
+    def _set_code_completions(self, comps: list, lines: Optional[list[str]] = None):
+        """Set completions and their display lines (in the same order)."""
+        if comps != list(self._cached_code_completions):
+            self._cached_code_completions = deque(comps)
+            self.__completion_lines = deque(lines or ())
+            self._refresh_completions_label()
+
+    def _refresh_completions_label(self, *args):
+        text = "\n".join(reversed(self.__completion_lines))
+        if text != self.completion_label.text:
+            self.completion_label.text = text
 
     def _scroll_down_completions(self, *args):
         if self._cached_code_completions:
-            p = self._cached_code_completions.pop(0)
-            self._cached_code_completions.append(p)
+            self._cached_code_completions.rotate(-1)
+            self.__completion_lines.rotate(-1)
+            self._trigger_completions_label()
 
     def _scroll_up_completions(self, *args):
         if self._cached_code_completions:
-            p = self._cached_code_completions.pop()
-            self._cached_code_completions.insert(0, p)
+            self._cached_code_completions.rotate(1)
+            self.__completion_lines.rotate(1)
+            self._trigger_completions_label()
+
+    def _shift_lines_up(self, *args):
+        self.code_entry.shift_lines(-1)
+
+    def _shift_lines_down(self, *args):
+        self.code_entry.shift_lines(1)
 
     def _join_split_lines_len(self, *args):
         length = settings.get("linter.max_line_length")
@@ -457,16 +536,24 @@ class CodeEditor(kx.Anchor):
     def _refresh_line_gutters(self, *a):
         start, finish = self.code_entry.visible_line_range()
         finish = min(finish, len(self.code_entry._lines))
-        error_lines = set(e.line for e in self.__errors)
-        gutter_text = []
-        append = gutter_text.append
-        gutter_width = self.__gutter_width
-        for line_num in range(start + 1, finish + 1):
-            s = f"{str(line_num)[:gutter_width]:>{gutter_width}}"
-            if line_num in error_lines:
-                s = f"[color=#ff0000]{s}[/color]"
-            append(s)
-        self.line_gutter.text = "\n".join(gutter_text)
+        # Formatted line numbers are cached in a single string and extended as
+        # needed, every line has the same width so visible lines are one slice
+        stride = self.__gutter_width + 1
+        cached_count = len(self.__gutter_blob) // stride
+        if cached_count < finish:
+            new_lines = range(cached_count + 1, finish + 1)
+            new_blob = "\n".join(map(self.__gutter_format, new_lines))
+            self.__gutter_blob = f"{self.__gutter_blob}{new_blob}\n"
+        end = max(finish * stride - 1, start * stride)
+        gutter_text = self.__gutter_blob[start * stride:end]
+        error_idxs = {e.line - start - 1 for e in self.__errors}
+        error_idxs.intersection_update(range(finish - start))
+        if error_idxs:
+            gutter_lines = gutter_text.split("\n")
+            for idx in error_idxs:
+                gutter_lines[idx] = f"[color=#ff0000]{gutter_lines[idx]}[/color]"
+            gutter_text = "\n".join(gutter_lines)
+        self.line_gutter.text = gutter_text
 
     def _on_size(self, w, size):
         self._refresh_line_gutters()
@@ -483,6 +570,8 @@ class CodeEditor(kx.Anchor):
         self.im.active = focus
 
     def _on_text(self, *a):
+        self.__disk_diff_stale = True
+        self.__completions_cache.clear()
         self.__update_errors_trigger()
         self._on_cursor()
         kx.schedule_once(self._refresh_line_gutters)
@@ -498,45 +587,88 @@ class CodeEditor(kx.Anchor):
 
     def _cursor_full(self):
         line, column = self.cursor
-        path = self.session.repr_full_path(self._current_file, include_icon=False)
-        icon = self.session.get_path_icon(self._current_file)
-        modified = ""
-        if self.__disk_modified_time:
-            modified = _format_humanized(self.__disk_modified_time)
+        path, icon = self._get_path_repr()
+        # Humanized time is refreshed with disk checks rather than on every call
+        modified = self.__disk_modified_repr
         diff = "*" if self.__disk_diff else ""
         return f"[{modified}{diff}] {icon} :: {path} ::{line:>4},{column:<3}"
 
+    def _get_path_repr(self) -> tuple[str, str]:
+        # Cached since it only changes when the file changes (on save/load)
+        if self.__cached_path_repr is None:
+            file = self._current_file
+            self.__cached_path_repr = (
+                self.session.repr_full_path(file, include_icon=False),
+                self.session.get_path_icon(file),
+            )
+        return self.__cached_path_repr
+
     def _refresh_context(self, *a):
+        self.__context_request += 1
+        if self.__context_future is not None:
+            self.__context_future.cancel()
         if self._current_file.suffix != ".py":
             self.status_cursor_context.text = "__file__"
             return
-        code = self.code_entry
+        # Jedi may be busy with completions or errors, don't wait for it here
+        request = self.__context_request
         line, col = self.cursor
-        context = self.session.get_context(self.file, code.text, line, col)
-        if context is None:
-            context = "__ unknown context __"
-        elif context.full_name is None:
-            context = f"__ unknown context __.{context.name}"
-        else:
-            context = context.full_name[len(context.module_name) + 1:] or "__module__"
+        self.__context_future = submit_to_main(
+            EXECUTOR,
+            _get_context_repr,
+            (self.session, self.file, self.code_entry.text, line, col),
+            self._set_status_context,
+            lambda: request == self.__context_request,
+        )
+
+    def _set_status_context(self, context: str):
         self.status_cursor_context.text = context
 
-    def update_errors(self, *args):
+    def update_errors(self, *args, background: bool = False):
+        """Update and return errors, optionally getting them in the background.
+
+        When getting errors in the background, the current errors are returned and
+        will be updated when the results arrive (unless superseded by another call).
+        """
+        self.__errors_request += 1
         if self._current_file.suffix == ".py":
             code = self.code_entry.text
             code_hash = hash(code)
             if self.__last_errors_hash != code_hash:
                 logger.debug(f"Getting errors for {code_hash=}")
+                if background:
+                    # Only the latest lint run matters, drop any that did not start
+                    if self.__errors_future is not None:
+                        self.__errors_future.cancel()
+                    request = self.__errors_request
+                    self.__errors_future = submit_to_main(
+                        EXECUTOR,
+                        self.session.get_errors,
+                        (code,),
+                        partial(self._on_errors_result, code_hash),
+                        lambda: request == self.__errors_request,
+                    )
+                    return self.__errors
                 self.__last_errors_hash = code_hash
                 errors = self.session.get_errors(code)
             else:
                 errors = self.__errors
         else:
             errors = []
+        self._set_errors(errors)
+        return errors
+
+    def _update_errors_background(self, *args):
+        self.update_errors(background=True)
+
+    def _on_errors_result(self, code_hash: int, errors: list):
+        self.__last_errors_hash = code_hash
+        self._set_errors(errors)
+
+    def _set_errors(self, errors: list):
         self.__errors = errors
         self._refresh_status_errors()
         self._refresh_line_gutters()
-        return errors
 
     def _refresh_status_errors(self, *args):
         error = self._get_next_error(include_cursor_index=True)
@@ -576,6 +708,11 @@ class CodeEditor(kx.Anchor):
         entry.defocus_brightness = settings.get("editor.defocus_brightness")
         entry.set_background(kx.XColor(*settings.get("editor.bg_color")).rgba)
         self.__gutter_width = settings.get("editor.gutter_width")
+        # Right-aligned line number, truncated to gutter width
+        self.__gutter_format = (
+            f"{{!s:>{self.__gutter_width}.{self.__gutter_width}}}".format
+        )
+        self.__gutter_blob = ""
         line_gutter = self.line_gutter
         line_gutter.set_size(x=self.__gutter_width * CHAR_WIDTH)
         line_gutter.make_bg(kx.XColor(*settings.get("editor.gutter_bg_color")))
@@ -583,7 +720,6 @@ class CodeEditor(kx.Anchor):
         self._refresh_line_gutters()
         errors_trigger = self.__update_errors_trigger.ev
         errors_trigger.timeout = settings.get("editor.error_check_cooldown")
-        self.__disk_diff_ev.timeout = settings.get("editor.disk_diff_interval")
         self.__status_bg = kx.XColor(*settings.get("ui.status.normal"))
         self.__status_bg_warn = kx.XColor(*settings.get("ui.status.warn"))
         self.__status_bg_error = kx.XColor(*settings.get("ui.status.error"))
@@ -593,6 +729,27 @@ class CodeEditor(kx.Anchor):
         lhint_color = settings.get("editor.line_width_hint_color")
         self.line_width_hint_color.rgba = kx.XColor(*lhint_color).rgba
 
+    _hotkeys = (
+        # Name, callback attribute, keys, and optional register arguments
+        ("Open settings", "_open_settings", "f11"),
+        ("Reload", "reload", "^ l"),
+        ("Save", "save", "^ s"),
+        ("Delete file", "delete_file", "^+ delete"),
+        ("Duplicate lines", "code_entry.duplicate", "^+ d", True),
+        ("Shift lines up", "_shift_lines_up", "!+ up", True),
+        ("Shift lines down", "_shift_lines_down", "!+ down", True),
+        ("Find next", "find_next", "^ ]", True),
+        ("Find previous", "find_prev", "^ [", True),
+        ("Complete code", "_do_complete", "! enter"),
+        ("Scroll up code comps", "_scroll_up_completions", "! up", True),
+        ("Scroll down code comps", "_scroll_down_completions", "! down", True),
+        ("Next error", "scroll_to_error", "^ e", True),
+        ("Comment", "make_comment", "^ \\"),
+        ("Toggle case", "code_entry.toggle_case", "^ u"),
+        ("Join/split lines", "code_entry.join_split_lines", "^ j"),
+        ("Join/split lines to len", "_join_split_lines_len", "^+ j"),
+    )
+
     _refresh_settings_bound_names = (
         "editor.style",
         "editor.bg_color",
@@ -603,7 +760,23 @@ class CodeEditor(kx.Anchor):
         "editor.gutter_bg_color",
         "editor.gutter_text_color",
         "editor.error_check_cooldown",
-        "editor.disk_diff_interval",
         "editor.line_width_hint_color",
         "linter.max_line_length",
     )
+
+
+def _find_word_snippets(last_word: str) -> list[Snippet]:
+    return find_snippets(last_word) if last_word else []
+
+
+def _get_completions_and_snippets(get_comps, last_word: str) -> tuple[list, list]:
+    return get_comps(), _find_word_snippets(last_word)
+
+
+def _get_context_repr(session, file: Path, code: str, line: int, col: int) -> str:
+    context = session.get_context(file, code, line, col)
+    if context is None:
+        return "__ unknown context __"
+    if context.full_name is None:
+        return f"__ unknown context __.{context.name}"
+    return context.full_name[len(context.module_name) + 1:] or "__module__"
@@ -48,6 +48,12 @@ class Container(kx.Anchor):
         self.register_hotkeys()
         self.app.bind(current_focus=self._check_focus)
         kx.schedule_once(self.panels[0].set_focus)
+        # Disk diff is checked for all editors in a single interval
+        self._disk_diff_ev = kx.schedule_interval(
+            self._check_disk_diffs,
+            settings.get("editor.disk_diff_interval"),
+        )
+        settings.bind("editor.disk_diff_interval", self._refresh_disk_diff_interval)
 
     def _check_focus(self, w, current_focus):
         panel = current_focus
@@ -64,6 +70,13 @@ class Container(kx.Anchor):
             panel = panel.parent
         return
 
+    def _check_disk_diffs(self, *args):
+        for panel in self.panels:
+            panel.code_editor.check_disk_diff()
+
+    def _refresh_disk_diff_interval(self, *args):
+        self._disk_diff_ev.timeout = settings.get("editor.disk_diff_interval")
+
     def _check_descendent(self, widget):
         while widget:
             if widget is self:
@@ -2,11 +2,12 @@
 
 from loguru import logger
 from pathlib import Path
+import stat
 import subprocess
 from . import MODAL_SIZE_KW
 from .. import kex as kx, UI_FONT_KW, UI_LINE_HEIGHT
 from ...util import settings
-from ...util.file import PROJ_DIR, open_path
+from ...util.file import PROJ_DIR, open_path, scan_children
 
 
 TREE_TOP_PREFIX = "╚╦═ "
@@ -23,6 +24,7 @@ class Disk(kx.Modal):
         self.session = session
         self._current_paths = []
         self._current_reprs = []
+        self._path_colors: dict[Path, str] = {}
         self._create_bookmarks()
         super().__init__(**kwargs)
         self.set_size(**MODAL_SIZE_KW)
@@ -76,7 +78,7 @@ class Disk(kx.Modal):
             else:
                 name = self._path_repr(p, name_only=False)
             paths.append(p)
-            reprs.append(_wrap_color(name, _get_color(p)))
+            reprs.append(_wrap_color(name, self._get_path_color(p)))
         root_path = self.session.dir_tree.root
         root_icon = self.session.get_path_icon(root_path)
         paths.append(root_path)
@@ -130,6 +132,7 @@ class Disk(kx.Modal):
         super()._on_parent(w, parent)
         if parent is None:
             return
+        self._path_colors = {}
         self.tree_list.set_focus()
         self._trigger_refresh_items()
 
@@ -151,29 +154,54 @@ class Disk(kx.Modal):
         logger.info(f"Exploring path: {path}")
         open_path(path)
 
-    def _get_children(self, path: Path):
-        func = self.session.dir_tree.get_children_from_disk
-        return func(path, use_file_types=False, use_path_filter=False)
+    def _get_children(self, path: Path) -> list[Path]:
+        # Directory entries carry their type, which is cached for coloring
+        children = []
+        append = children.append
+        path_colors = self._path_colors
+        for entry in scan_children(path):
+            child = Path(entry.path)
+            try:
+                if entry.is_dir():
+                    color = FOLDER_COLOR
+                elif entry.is_file():
+                    color = FILE_COLOR
+                else:
+                    color = MISSING_COLOR
+            except OSError:
+                color = MISSING_COLOR
+            path_colors[child] = color
+            append(child)
+        # Folders first
+        return sorted(children, key=lambda c: (path_colors[c] == FILE_COLOR, str(c)))
 
     def _path_repr(self, p: Path, name_only: bool) -> str:
+        color = self._get_path_color(p)
+        is_dir = color == FOLDER_COLOR
         if name_only:
-            name = f"{self.session.get_path_icon(p)} {p.name}"
+            name = f"{self.session.get_path_icon(p, is_dir=is_dir)} {p.name}"
         else:
             name = self.session.repr_full_path(p)
-        if p.is_dir():
-            color = FOLDER_COLOR
+        if is_dir:
             name = f"{name}/"
-        elif p.is_file():
-            color = FILE_COLOR
-        else:
-            color = MISSING_COLOR
         return _wrap_color(name, color)
 
+    def _get_path_color(self, p: Path) -> str:
+        # Cached until the modal is reopened
+        color = self._path_colors.get(p)
+        if color is None:
+            color = self._path_colors[p] = _get_color(p)
+        return color
+
 
 def _get_color(p: Path) -> str:
-    if p.is_dir():
+    try:
+        mode = p.stat().st_mode
+    except OSError:
+        return MISSING_COLOR
+    if stat.S_ISDIR(mode):
         return FOLDER_COLOR
-    elif p.is_file():
+    elif stat.S_ISREG(mode):
         return FILE_COLOR
     return MISSING_COLOR
 
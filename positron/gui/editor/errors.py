@@ -1,10 +1,15 @@
 """Code errors modal."""
 
+from operator import attrgetter
 from . import MODAL_SIZE_KW
-from .. import kex as kx, UI_FONT_KW
+from .. import kex as kx, UI_FONT_KW, UI_LINE_HEIGHT
 
 
-class Errors(kx.FocusBehavior, kx.Modal):
+ERROR_COLOR = "#ff44ff"
+_get_error_fields = attrgetter("line", "column", "message")
+
+
+class Errors(kx.Modal):
     def __init__(self, session, **kwargs):
         super().__init__(**kwargs)
         self.session = session
@@ -13,37 +18,31 @@ class Errors(kx.FocusBehavior, kx.Modal):
         # Widgets
         title = kx.Label(text="Code Errors", bold=True, **UI_FONT_KW)
         title.set_size(y=50)
-        self.summary_label = kx.Label(
-            halign="left",
-            valign="top",
-            fixed_width=True,
-            color=kx.get_color("magenta").rgba,
-            padding=(10, 10),
+        # Only visible rows are rendered, regardless of how many errors there are
+        self.errors_list = kx.List(
+            shorten_from="right",
+            item_height=UI_LINE_HEIGHT,
             **UI_FONT_KW,
         )
-        self.scroll_frame = kx.Scroll(view=self.summary_label)
         # Assemble
         main_frame = kx.Box(orientation="vertical")
-        main_frame.add(title, self.scroll_frame)
+        main_frame.add(title, self.errors_list)
         self.add(main_frame)
         self.bind(parent=self._on_parent)
 
     def get_errors(self, *args):
-        self.summary_label.scroll_y = 1
         errors = self.container.code_editor.update_errors()
-        if errors:
-            summary = "\n".join((
-                f"{error.line:>5},{error.column:>3} :: {error.message}"
-                for error in errors
-            ))
-        else:
-            summary = "No errors :)"
-        self.summary_label.text = summary
+        items = [
+            _wrap_color(kx.escape_markup("%5d,%3d :: %s" % fields), ERROR_COLOR)
+            for fields in map(_get_error_fields, errors)
+        ]
+        self.errors_list.items = items or ["No errors :)"]
+        self.errors_list.select(0)
 
     def _on_parent(self, w, parent):
         super()._on_parent(w, parent)
         if parent is not None:
-            self.focus = True
+            self.errors_list.focus = True
             self.get_errors()
 
     def on_touch_down(self, touch):
@@ -57,17 +56,6 @@ class Errors(kx.FocusBehavior, kx.Modal):
             touch.ungrab(self)
             return True
 
-    def keyboard_on_key_down(self, w, key, text, mods):
-        keycode, key = key
-        if keycode == 278:  # home
-            self.scroll_frame.scroll_y = 1
-        elif keycode == 279:  # end
-            self.scroll_frame.scroll_y = 0
-        elif keycode == 280:  # page up
-            self.scroll_frame.scroll_up(count=10)
-        elif keycode == 281:  # page down
-            self.scroll_frame.scroll_down(count=10)
-        elif keycode == 273:  # up arrow
-            self.scroll_frame.scroll_up()
-        elif keycode == 274:  # down arrow
-            self.scroll_frame.scroll_down()
+
+def _wrap_color(t, color):
+    return f"[color={color}]{t}[/color]"
@@ -45,10 +45,6 @@ class Goto(kx.Modal):
     def goto_start(self, *args):
         self.goto(*args, end=False)
 
-    def find_prev(self, *args):
-        self.container.code_editor.find_prev(self.line_number_entry.text)
-        self.dismiss()
-
     def _on_parent(self, w, parent):
         super()._on_parent(w, parent)
         if parent is not None:
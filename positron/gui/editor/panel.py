@@ -3,6 +3,7 @@
 Contains the code editor and modals.
 """
 
+from functools import partial
 from .. import kex as kx
 from .code import CodeEditor
 from .tree import ProjectTree
@@ -21,6 +22,7 @@ class Panel(kx.Anchor):
     def __init__(self, uid: int, container, session, file: str, **kwargs):
         super().__init__(**kwargs)
         self.__uid = uid
+        self.__session = session
         self.im = kx.InputManager(name=f"Editor panel {uid}", active=False)
         # Code
         self.code_editor = self.add(CodeEditor(session, uid, file))
@@ -35,19 +37,32 @@ class Panel(kx.Anchor):
             (Search, "search", "^+ f"),
             (Disk, "disk", "^ k"),
         ]
+        # Modals are created on first use
+        self.__modal_classes = {}
         self.modals = {}
         for modal_cls, name, hotkey in modals:
-            modal = modal_cls(
-                session=session,
+            self.__modal_classes[name] = modal_cls
+            if hotkey:
+                toggle = partial(self._toggle_modal, name)
+                self.im.register(f"Toggle {name} modal", toggle, hotkey)
+        self.im.register("Reload", self.reload, "f5")
+        container.bind(current_focus=self._on_panel_focus)
+
+    def get_modal(self, name: str) -> kx.Modal:
+        """Get a modal by name, creating it if it does not exist yet."""
+        modal = self.modals.get(name)
+        if modal is None:
+            modal = self.__modal_classes[name](
+                session=self.__session,
                 container=self,
-                name=f"{name} modal {uid}",
+                name=f"{name} modal {self.__uid}",
             )
             self.modals[name] = modal
             modal.bind(parent=self._on_modal)
-            if hotkey:
-                self.im.register(f"Toggle {name} modal", modal.toggle, hotkey)
-        self.im.register("Reload", self.reload, "f5")
-        container.bind(current_focus=self._on_panel_focus)
+        return modal
+
+    def _toggle_modal(self, name: str):
+        self.get_modal(name).toggle()
 
     def _on_modal(self, modal, parent):
         assert parent is self or parent is None
@@ -1,15 +1,29 @@
 """Project search."""
 
 from loguru import logger
+import os
+from typing import Optional
+from pathlib import Path
+from concurrent.futures import Future
+from functools import partial, lru_cache
 from . import MODAL_SIZE_KW
+from .background import EXECUTOR, submit_to_main
 from .. import kex as kx, UI_FONT_KW, UI_CHAR_WIDTH, UI_LINE_HEIGHT
 from ...util import settings
-from ...util.file import file_load, search_text
+from ...util.file import (
+    FileCursor,
+    file_load_cached,
+    search_text,
+    filter_search_results,
+)
 
 
 DESCRIPTION_COLOR = "#44dd44"
 LOCATION_COLOR = "#bb44bb"
 CONTEXT_COLOR = "#22bbbb"
+PENDING_CONTEXT = "..."
+CONTEXT_OVERSCAN = 4
+RENDERED_CACHE_SIZE = 1_000
 
 
 class Search(kx.Modal):
@@ -17,6 +31,11 @@ class Search(kx.Modal):
         super().__init__(**kwargs)
         self.session = session
         self._results = []
+        self.__search_request = 0
+        self.__search_future: Optional[Future] = None
+        self.__last_search: tuple[str, Optional[list]] = "", None
+        self.__pending_contexts: set[int] = set()
+        self.__rendered: dict[tuple, str] = {}  # Finished items by result and width
         self.set_size(**MODAL_SIZE_KW)
         self.make_bg(kx.get_color("cyan", v=0.2))
         self.title = kx.Label(text="Search Project", bold=True, **UI_FONT_KW)
@@ -42,6 +61,10 @@ class Search(kx.Modal):
             item_height=UI_LINE_HEIGHT * 3,
             **UI_FONT_KW,
         )
+        self.results_list.bind(
+            scroll=self._refresh_visible_contexts,
+            size=self._refresh_visible_contexts,
+        )
 
         # Assemble
         panel_frame = kx.Box(orientation="vertical")
@@ -84,50 +107,117 @@ class Search(kx.Modal):
         self._do_load(self._results[index])
 
     def _do_refresh_results(self, *args):
+        self.__search_request += 1
         pattern = self.search_entry.text
-        results = None
-        if pattern:
-            results = search_text(
-                pattern,
-                self.session.dir_tree.all_paths,
-                max_results=settings.get("project.max_search_results"),
-            )
+        if not pattern:
+            self._set_results(pattern, None)
+            return
+        max_results = settings.get("project.max_search_results")
+        # Extending the pattern of complete results can only narrow them down
+        last_pattern, last_results = self.__last_search
+        if (
+            last_results is not None
+            and pattern.startswith(last_pattern)
+            and (not max_results or len(last_results) < max_results)
+        ):
+            self._set_results(pattern, filter_search_results(last_results, pattern))
+            return
+        # Stop reading files as soon as a newer search makes this one obsolete
+        request = self.__search_request
+        files = _iter_while(
+            self.session.dir_tree.all_files,
+            lambda: request == self.__search_request,
+        )
+        if self.__search_future is not None:
+            self.__search_future.cancel()
+        self.__search_future = submit_to_main(
+            EXECUTOR,
+            partial(search_text, max_results=max_results),
+            (pattern, files),
+            partial(self._set_results, pattern),
+            lambda: request == self.__search_request,
+        )
+
+    def _set_results(self, pattern: str, results: Optional[list]):
         logger.debug(f"{len(results)=}" if results else "No results")
+        self.__last_search = pattern, results
         self._results = results
         self._refresh_list()
 
     def _refresh_list(self, *args):
-        root = self.session.dir_tree.root
-        items = []
-        append = items.append
         if not self._results:
+            self.__pending_contexts = set()
             self.results_list.items = ["No results."]
             return
-        line_width = int(self.results_list.width / UI_CHAR_WIDTH)
-        get_context = self.session.get_context
-        for location, text in self._results:
-            if location.file.suffix == ".py":
-                ctx = get_context(
-                    path=location.file,
-                    code=file_load(location.file),
-                    line=location.cursor[0],
-                    col=location.cursor[1],
-                )
-                context = ctx.full_name or f"?.{ctx.name}"
-            else:
-                context = location.file.name
-            context = context[-line_width:]
-            file = f"$/{location.file.relative_to(root)}"[-line_width:]
-            cursor = f"{location.cursor[0]:>4},{location.cursor[1]:>3}"
-            loc = f"{file} ::{cursor}"
-            text = kx.escape_markup(text).strip()[:line_width]
-            item = "\n".join([
-                _wrap_color(loc, LOCATION_COLOR),
-                _wrap_color(context, CONTEXT_COLOR),
-                _wrap_color(text, DESCRIPTION_COLOR),
-            ])
-            append(item)
+        # Resolving Python contexts is slow, only do so for visible results
+        rendered = self.__rendered
+        if len(rendered) > RENDERED_CACHE_SIZE:
+            rendered.clear()
+        line_width = self._get_line_width()
+        pending = set()
+        items = []
+        for idx, (location, text) in enumerate(self._results):
+            item = rendered.get((location, text, line_width))
+            if item is None:
+                if location.file.suffix == ".py":
+                    pending.add(idx)
+                    item = self._format_result(location, text, PENDING_CONTEXT)
+                else:
+                    context = location.file.name
+                    item = self._format_result(location, text, context)
+                    rendered[(location, text, line_width)] = item
+            items.append(item)
+        self.__pending_contexts = pending
         self.results_list.items = items
+        self._refresh_visible_contexts()
+
+    def _refresh_visible_contexts(self, *args):
+        pending = self.__pending_contexts
+        if not pending:
+            return
+        results_list = self.results_list
+        visible_count = int(results_list.height / results_list.item_height)
+        start = results_list.scroll
+        visible = range(start, start + visible_count + CONTEXT_OVERSCAN)
+        resolve = pending.intersection(visible)
+        if not resolve:
+            return
+        pending -= resolve
+        locations = [(idx, self._results[idx][0]) for idx in sorted(resolve)]
+        request = self.__search_request
+        submit_to_main(
+            EXECUTOR,
+            _resolve_contexts,
+            (self.session, locations),
+            self._set_contexts,
+            lambda: request == self.__search_request,
+        )
+
+    def _set_contexts(self, contexts: list[tuple[int, str]]):
+        items = list(self.results_list.items)
+        line_width = self._get_line_width()
+        for idx, context in contexts:
+            location, text = self._results[idx]
+            item = self._format_result(location, text, context)
+            self.__rendered[(location, text, line_width)] = item
+            items[idx] = item
+        self.results_list.items = items
+
+    def _get_line_width(self) -> int:
+        return int(self.results_list.width / UI_CHAR_WIDTH)
+
+    def _format_result(self, location: FileCursor, text: str, context: str) -> str:
+        line_width = self._get_line_width()
+        context = context[-line_width:]
+        file = f"$/{location.file.relative_to(self.session.dir_tree.root)}"
+        cursor = f"{location.cursor[0]:>4},{location.cursor[1]:>3}"
+        loc = f"{file[-line_width:]} ::{cursor}"
+        text = kx.escape_markup(text).strip()[:line_width]
+        return "\n".join([
+            _wrap_color(loc, LOCATION_COLOR),
+            _wrap_color(context, CONTEXT_COLOR),
+            _wrap_color(text, DESCRIPTION_COLOR),
+        ])
 
     def _on_search_text(self, *args):
         self._refresh_results()
@@ -136,6 +226,9 @@ class Search(kx.Modal):
         super()._on_parent(w, parent)
         if parent is None:
             return
+        # Files may have changed while closed
+        self.__last_search = "", None
+        self.__rendered.clear()
         selected_text = self.container.code_editor.selected_text
         if selected_text:
             self.search_entry.text = selected_text
@@ -143,5 +236,47 @@ class Search(kx.Modal):
         self._on_search_text()
 
 
+def _resolve_contexts(
+    session,
+    locations: list[tuple[int, FileCursor]],
+) -> list[tuple[int, str]]:
+    resolved = []
+    append = resolved.append
+    for idx, location in locations:
+        file = location.file
+        try:
+            stat = os.stat(file)
+        except OSError:
+            mtime_ns = size = None
+        else:
+            mtime_ns, size = stat.st_mtime_ns, stat.st_size
+        line, col = location.cursor
+        append((idx, _get_context_name(session, file, mtime_ns, size, line, col)))
+    return resolved
+
+
+@lru_cache(maxsize=1024)
+def _get_context_name(
+    session,
+    file: Path,
+    mtime_ns: Optional[int],
+    size: Optional[int],
+    line: int,
+    col: int,
+) -> str:
+    # Modification time and size are only part of the key, so that entries are
+    # invalidated when the file changes without hashing its contents on every hit
+    code = file_load_cached(file) or ""
+    ctx = session.get_context(path=file, code=code, line=line, col=col)
+    return ctx.full_name or f"?.{ctx.name}"
+
+
+def _iter_while(items, condition):
+    for item in items:
+        if not condition():
+            return
+        yield item
+
+
 def _wrap_color(t, color):
     return f"[color={color}]{t}[/color]"
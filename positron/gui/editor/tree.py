@@ -3,13 +3,12 @@
 from loguru import logger
 import arrow
 from pathlib import Path
-import fuzzysearch
 from . import MODAL_SIZE_KW
 from .. import kex as kx, UI_FONT_KW, UI_LINE_HEIGHT
 from ...util import settings
+from ...util.fuzzy import fuzzy_match
 
 
-MISSING_COLOR = "#ff0000"
 FOLDER_COLOR = "#0066ff"
 FILE_COLOR = "#00ff66"
 QUICK_FILE_COLOR = "#00ffff"
@@ -21,6 +20,10 @@ class ProjectTree(kx.Modal):
         self.session = session
         self._last_modified = self.dtree.last_modified.shift(seconds=-1)
         self._quick_file = None
+        self._files = []
+        self.__rendered_modified = None
+        self.__rendered_paths: list[str] = []
+        self.__rendered_items: list[str] = []
         self.set_size(**MODAL_SIZE_KW)
         self.make_bg(kx.get_color("cyan", v=0.2))
         self.title = kx.Label(**UI_FONT_KW)
@@ -127,61 +130,74 @@ class ProjectTree(kx.Modal):
 
     def _do_refresh_tree(self, *args):
         root = self.dtree.root
-        get_icon = self.session.get_path_icon
-        items = [str(root)]
+        self._refresh_rendered_paths()
+        all_paths = self.dtree.all_paths
+        indices = self._get_tree_indices()
+        self._files = [all_paths[i] for i in indices]
         self._quick_file = None
-        self._files = self._get_tree_files()
         self.quick_label.text = f"{root}/..."
-        if self._files:
-            items = []
-            append = items.append
-            for f in self._files:
-                path_str = kx.escape_markup(f"{get_icon(f)} $/{f.relative_to(root)}")
-                color = MISSING_COLOR
-                if f.is_dir():
-                    color = FOLDER_COLOR
-                elif f.is_file():
-                    color = FILE_COLOR
-                    if self._quick_file is None:
-                        self._quick_file = f
-                        self.quick_label.text = _wrap_color(path_str, QUICK_FILE_COLOR)
-                append(_wrap_color(path_str, color))
+        items = [str(root)]
+        if indices:
+            is_file = self.dtree.is_file
+            items = [self.__rendered_items[i] for i in indices]
+            for i in indices:
+                if is_file(all_paths[i]):
+                    self._quick_file = all_paths[i]
+                    path_str = self.__rendered_paths[i]
+                    self.quick_label.text = _wrap_color(path_str, QUICK_FILE_COLOR)
+                    break
         self.tree_list.items = items
         self.tree_list.selection = 0
         self._refresh_title()
 
-    def _get_tree_files(self, *args):
-        logger.debug(f"Tree modal refreshing files from {self.dtree} {arrow.now()}")
+    def _refresh_rendered_paths(self):
+        # Path strings only change when the tree is reindexed, not when filtering
+        if self.__rendered_modified == self.dtree.last_modified:
+            return
+        self.__rendered_modified = self.dtree.last_modified
         root = self.dtree.root
+        get_icon = self.session.get_path_icon
+        is_file = self.dtree.is_file
+        paths = []
+        items = []
+        for f in self.dtree.all_paths:
+            # File types are known from indexing, avoid stat calls for every path
+            f_is_file = is_file(f)
+            icon = get_icon(f, is_dir=not f_is_file)
+            path_str = kx.escape_markup(f"{icon} $/{f.relative_to(root)}")
+            paths.append(path_str)
+            color = FILE_COLOR if f_is_file else FOLDER_COLOR
+            items.append(_wrap_color(path_str, color))
+        self.__rendered_paths = paths
+        self.__rendered_items = items
+
+    def _get_tree_indices(self, *args) -> list[int]:
+        logger.debug(f"Tree modal refreshing files from {self.dtree} {arrow.now()}")
         pattern = self.search_entry.text.lower()
-        files = all_paths = self.dtree.all_paths
+        all_paths_rel_lower = self.dtree.all_paths_rel_lower
+        if not pattern:
+            return list(range(len(all_paths_rel_lower)))
         do_fuzzy = self.fuzzy_enabled
         fuzzy_ldist = settings.get("project.tree_search_fuzziness")
-        if pattern:
-            files = []
-            append = files.append
-            for path in all_paths:
-                path_str = str(path.relative_to(root)).lower()
-                if do_fuzzy:
-                    match = fuzzysearch.find_near_matches(
-                        pattern,
-                        path_str,
-                        max_l_dist=fuzzy_ldist,
-                        max_deletions=0,
-                        max_insertions=fuzzy_ldist,
-                        max_substitutions=0,
-                    )
-                else:
-                    match = pattern in path_str
-                if match:
-                    append(path)
-        return sorted(files, key=self.dtree.sort_folders_key)
+        indices = []
+        append = indices.append
+        for idx, path_str in enumerate(all_paths_rel_lower):
+            # Exact matches are also fuzzy matches, and much cheaper to find
+            match = pattern in path_str
+            if not match and do_fuzzy:
+                # Only insertions are allowed, i.e. skipped characters in the path
+                fuzzy = fuzzy_match(pattern, path_str)
+                match = fuzzy is not None and fuzzy[0] <= fuzzy_ldist
+            if match:
+                append(idx)
+        # Paths are already sorted in the tree
+        return indices
 
     def _refresh_title(self):
         if self.dtree.last_modified == self._last_modified:
             return
         self._last_modified = self.dtree.last_modified
-        file_count = sum(p.is_file() for p in self.dtree.all_paths)
+        file_count = len(self.dtree.all_files)
         fuzzy_warn = "" if self.fuzzy_enabled else " (no fuzzy search)"
         self.title.text = (
             f"[b]Project Tree: {file_count}[/b] files{fuzzy_warn}\n"
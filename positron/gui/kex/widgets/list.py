@@ -1,6 +1,7 @@
 """List widget."""
 
 from typing import Optional
+from functools import lru_cache
 from .. import kivy as kv
 from ..util import text_texture
 from .layouts import XRelative
@@ -8,12 +9,7 @@ from .layouts import XRelative
 
 OUTLINE = "atlas://data/images/defaulttheme/bubble_btn_pressed"
 EMPTY_TEXTURE = text_texture(" ")
-
-# Cache setup
-kv.Cache.register("XList")
-cache_append = kv.Cache.append
-cache_get = kv.Cache.get
-cache_remove = kv.Cache.remove
+TEXTURE_CACHE_SIZE = 1_000
 
 
 class XList(kv.FocusBehavior, XRelative):
@@ -37,6 +33,9 @@ class XList(kv.FocusBehavior, XRelative):
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
         self._rects = []
+        self._rect_texts: list[Optional[str]] = []  # Text last rendered by each rect
+        # Textures by text, cleared whenever the label kwargs change
+        self._get_texture = lru_cache(maxsize=TEXTURE_CACHE_SIZE)(self._render_texture)
         self._scroll = 0
         self.items = ["placeholder"]
         self._refresh_label_kwargs()
@@ -148,6 +147,7 @@ class XList(kv.FocusBehavior, XRelative):
         rect_count = max(1, int(height / item_height))
         size = self.width, item_height
         self._rects = []
+        self._rect_texts = [None] * rect_count
         append = self._rects.append
         with self.canvas:
             for i in range(rect_count):
@@ -166,17 +166,19 @@ class XList(kv.FocusBehavior, XRelative):
         items = self.items
         scroll = self.scroll
         item_count = len(items)
+        rect_texts = self._rect_texts
         for i, rect in enumerate(self._rects):
-            text = None
-            texture = EMPTY_TEXTURE
             idx = i + scroll
-            if idx < item_count:
-                text = items[idx]
-                texture = self._get_texture(text)
-            rect.texture = texture
+            text = items[idx] if idx < item_count else None
+            # Rects keep their texture when their item is unchanged, e.g. when the
+            # items are refreshed but the visible rows are the same
+            if text == rect_texts[i]:
+                continue
+            rect_texts[i] = text
+            rect.texture = EMPTY_TEXTURE if text is None else self._get_texture(text)
 
     def _on_label_kwargs(self, w, kwargs):
-        cache_remove("XList")
+        self._get_texture.cache_clear()
         self._refresh_graphics()
 
     def _refresh_label_kwargs(self, *args):
@@ -189,15 +191,10 @@ class XList(kv.FocusBehavior, XRelative):
             valign="middle",
         )
 
-    def _get_texture(self, text: str):
-        texture_id = f"{text}{self._label_kwargs}"
-        texture = cache_get("XList", texture_id)
-        if texture is None:
-            label = kv.CoreMarkupLabel(text=text, **self._label_kwargs)
-            label.refresh()
-            texture = label.texture
-            cache_append("XList", texture_id, texture)
-        return texture
+    def _render_texture(self, text: str):
+        label = kv.CoreMarkupLabel(text=text, **self._label_kwargs)
+        label.refresh()
+        return label.texture
 
     def _get_scroll(self):
         return self._scroll
@@ -1,16 +1,28 @@
 """Writing, loading, and opening files."""
 
-from typing import Optional, Iterable
+from typing import Optional, Iterable, Iterator
 from loguru import logger
 from dataclasses import dataclass
+from collections import OrderedDict
+from functools import partial, lru_cache
+from itertools import islice
 import os
+import re
 import shutil
+import tempfile
 import subprocess
 import platform
+import threading
 from pathlib import Path
+from stat import S_IMODE, S_ISREG
 import tomli
 
 
+# Read once on import, changing the umask to read it is not thread safe
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+
 @dataclass(frozen=True)
 class FileCursor:
     file: Path
@@ -40,6 +52,83 @@ def file_dump(file: os.PathLike, d: str, clear: bool = True):
         f.write(d)
 
 
+def file_dump_atomic(file: os.PathLike, d: str):
+    """Saves the string *d* to *file* by writing a temporary file and renaming it.
+
+    Readers will never see a partially written file, and a crash mid-write leaves
+    the original file intact. Symlinks are followed and the permissions and owner
+    of an existing file are preserved. Files that cannot be replaced without
+    breaking them (hardlinks, special files, a directory that does not allow it)
+    are written in place with `file_dump`.
+    """
+    # Replace the file that symlinks point to, rather than the links themselves
+    target = Path(os.path.realpath(file))
+    if not _dump_replace(target, d):
+        file_dump(target, d)
+
+
+def _dump_replace(file: Path, d: str) -> bool:
+    # Returns False without touching the file if it cannot be replaced safely
+    try:
+        file_stat = os.stat(file)
+    except FileNotFoundError:
+        file_stat = None
+    except OSError:
+        return False
+    if file_stat is not None:
+        if not S_ISREG(file_stat.st_mode) or file_stat.st_nlink > 1:
+            return False
+    try:
+        fd, tmp = tempfile.mkstemp(
+            dir=file.parent,
+            prefix=f".{file.name}.",
+            suffix=".tmp",
+        )
+    except OSError:
+        return False
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(d)
+            f.flush()
+            os.fsync(f.fileno())
+            tmp_stat = os.fstat(f.fileno())
+        if file_stat is None:
+            # Temporary files are private, new files should respect the umask
+            os.chmod(tmp, 0o666 & ~_UMASK)
+        else:
+            owner = file_stat.st_uid, file_stat.st_gid
+            if owner != (tmp_stat.st_uid, tmp_stat.st_gid):
+                try:
+                    os.chown(tmp, *owner)
+                except PermissionError:
+                    Path(tmp).unlink()
+                    return False
+            os.chmod(tmp, S_IMODE(file_stat.st_mode))
+        try:
+            os.replace(tmp, file)
+        except OSError:
+            Path(tmp).unlink(missing_ok=True)
+            return False
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+    return True
+
+
+def file_copy_if_newer(src: os.PathLike, dst: os.PathLike):
+    """Copy *src* to *dst*, unless *dst* is at least as new and of the same size."""
+    src_stat = os.stat(src)
+    try:
+        dst_stat = os.stat(dst)
+    except FileNotFoundError:
+        pass
+    else:
+        is_newer = dst_stat.st_mtime_ns >= src_stat.st_mtime_ns
+        if is_newer and dst_stat.st_size == src_stat.st_size:
+            return
+    shutil.copy(src, dst)
+
+
 def open_path(path: os.PathLike):
     """Opens the given path. Method used is platform-dependent."""
     if platform.system() == "Windows":
@@ -96,30 +185,66 @@ def _child_sort(child, breadth_first):
     return f"{int(dir_val)}{child}"
 
 
+MAX_CHILDREN = 1_000
+
+
 def yield_children(
     path: Path,
     /,
     *,
-    file_types: Optional[set[str]] = None,
-    max_children: int = 1_000,
+    file_types: Optional[frozenset[str]] = None,
+    ignore: Optional[re.Pattern] = None,
+    max_children: int = MAX_CHILDREN,
 ) -> Iterable[Path]:
-    """Yield children of a directory."""
+    """Yield children of a directory.
+
+    See also: `scan_children`.
+    """
     assert path.is_dir()
+    for entry in scan_children(
+        path,
+        file_types=file_types,
+        ignore=ignore,
+        max_children=max_children,
+    ):
+        yield path / entry.name
+
+
+def scan_children(
+    path: os.PathLike,
+    /,
+    *,
+    file_types: Optional[frozenset[str]] = None,
+    ignore: Optional[re.Pattern] = None,
+    max_children: int = MAX_CHILDREN,
+) -> Iterator[os.DirEntry]:
+    """Yield directory entries of the children of a directory.
+
+    Entries know their own type, avoiding a stat call per child. Children whose
+    path matches *ignore* are skipped before checking their type, and skipped
+    children do not count towards *max_children*.
+    """
     count = 0
     try:
-        next(path.iterdir())
+        scan = os.scandir(path)
     except PermissionError:
         logger.info(f"Permission denied, skipping: {path}")
         return
-    except StopIteration:
-        return
-    for child in path.iterdir():
-        if file_types and child.is_file() and child.suffix not in file_types:
-            continue
-        yield child
-        count += 1
-        if count > max_children:
-            break
+    with scan:
+        for entry in scan:
+            if ignore is not None and ignore.search(entry.path) is not None:
+                continue
+            if file_types and entry.is_file():
+                if os.path.splitext(entry.name)[1] not in file_types:
+                    continue
+            yield entry
+            count += 1
+            if count > max_children:
+                break
+
+
+BINARY_SNIFF_SIZE = 8_000
+FILE_CACHE_BYTES = 64_000_000
 
 
 def search_text(
@@ -131,42 +256,195 @@ def search_text(
     case_sensitive: bool = False,
     max_results: int = 0,
 ) -> list[tuple[FileCursor, str]]:
-    """Use grep to find a pattern in files."""
-    command_args = [
-        "grep",
-        "--with-filename",
-        "--line-num",
-        "--binary-files=without-match",
-        "--ignore-case" if case_sensitive else "--no-ignore-case",
-        "--basic-regexp" if use_regex else "--fixed-strings",
+    """Find a pattern in files, returning at most one result per line.
+
+    Binary files are skipped. With *use_regex* the pattern is a Python regular
+    expression, otherwise it is matched as a fixed string.
+    """
+    results = iter_search_text(
         pattern,
-    ]
-    results = []
-    count = 0
-    append = results.append
+        files,
+        use_regex=use_regex,
+        case_sensitive=case_sensitive,
+    )
+    return list(islice(results, max_results or None))
+
+
+def iter_search_text(
+    pattern: str,
+    files: Iterable[Path],
+    /,
+    *,
+    use_regex: bool = False,
+    case_sensitive: bool = False,
+) -> Iterator[tuple[FileCursor, str]]:
+    """Like `search_text` but yields results, files are only read as needed."""
+    search_file = _get_file_searcher(pattern, use_regex, case_sensitive)
     for file in files:
-        if not file.is_file():
+        data = _load_file_bytes_cached(file)
+        if data is None:
             continue
-        r = subprocess.run(command_args + [str(file)], capture_output=True, text=True)
-        if r.stderr:
-            raise ChildProcessError(r.stderr)
-        grep_output = r.stdout
-        for result in grep_output.split("\n"):
-            if not result:
-                continue
-            file, line, text = result.split(":", 2)
-            try:
-                file = Path(file)
-                line = int(line)
-            except ValueError:
-                logger.warning(f"Unexpected format from grep output: {line!r}")
-                continue
-            col = text.find(pattern)
-            append((FileCursor(file, (line, col)), text))
-            count += 1
-            if max_results and count >= max_results:
-                return results
-    return results
+        for line, col, line_text in search_file(data):
+            yield FileCursor(file, (line, col)), line_text
+
+
+def filter_search_results(
+    results: list[tuple[FileCursor, str]],
+    pattern: str,
+    /,
+    *,
+    case_sensitive: bool = False,
+) -> list[tuple[FileCursor, str]]:
+    """Narrow down results of `search_text` to lines that also match *pattern*.
+
+    Useful when *pattern* extends the pattern of a complete set of results, since
+    lines that match it are a subset of those that were already found.
+    """
+    needle = pattern if case_sensitive else pattern.lower()
+    filtered = []
+    append = filtered.append
+    for cursor, line_text in results:
+        col = (line_text if case_sensitive else line_text.lower()).find(needle)
+        if col >= 0:
+            append((FileCursor(cursor.file, (cursor.cursor[0], col)), line_text))
+    return filtered
+
+
+@lru_cache(maxsize=64)
+def _get_file_searcher(pattern: str, use_regex: bool, case_sensitive: bool):
+    if use_regex:
+        flags = re.MULTILINE if case_sensitive else re.MULTILINE | re.IGNORECASE
+        regex = re.compile(pattern, flags)
+        return partial(_search_file_regex, regex)
+    needle = pattern if case_sensitive else pattern.lower()
+    # Bytes can only be lowercased for ASCII, other patterns must decode the text
+    if case_sensitive or needle.isascii():
+        return partial(_search_file_bytes, needle.encode("utf-8"), not case_sensitive)
+    return partial(_search_file_text, needle)
+
+
+def file_load_cached(file: os.PathLike) -> Optional[str]:
+    """Load a text file, or None if it is missing, unreadable, or binary.
+
+    Contents are cached by path, modification time, and size.
+    """
+    data = _load_file_bytes_cached(file)
+    if data is None:
+        return None
+    return _decode_text(data)
+
+
+def _load_file_bytes_cached(file: os.PathLike) -> Optional[bytes]:
+    try:
+        stat = os.stat(file)
+    except OSError:
+        return None
+    return _FILE_BYTES_CACHE.get(os.fspath(file), stat.st_mtime_ns, stat.st_size)
+
+
+class _FileBytesCache:
+    """Least recently used file contents, bounded by their total size.
+
+    Entries are keyed by path and replaced when the modification time or size
+    changes. Thread safe, files are loaded from worker threads.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[str, tuple] = OrderedDict()  # mtime, size, data
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, file: str, mtime_ns: int, size: int) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entries.get(file)
+            if entry is not None and entry[:2] == (mtime_ns, size):
+                self._entries.move_to_end(file)
+                return entry[2]
+        data = _load_file_bytes(file)
+        with self._lock:
+            old = self._entries.pop(file, None)
+            if old is not None:
+                self._total_bytes -= len(old[2] or b"")
+            nbytes = len(data or b"")
+            if nbytes > self.max_bytes:
+                return data
+            self._entries[file] = mtime_ns, size, data
+            self._total_bytes += nbytes
+            while self._total_bytes > self.max_bytes:
+                _, (_, __, evicted) = self._entries.popitem(last=False)
+                self._total_bytes -= len(evicted or b"")
+        return data
+
+
+_FILE_BYTES_CACHE = _FileBytesCache(FILE_CACHE_BYTES)
+
+
+def _load_file_bytes(file: str) -> Optional[bytes]:
+    try:
+        with open(file, "rb") as f:
+            data = f.read()
+    except OSError:
+        return None
+    if b"\0" in data[:BINARY_SNIFF_SIZE]:
+        return None
+    return data
+
+
+@lru_cache(maxsize=16)
+def _decode_text(data: bytes) -> str:
+    # Cached so that the same contents are decoded to the same string object
+    return data.decode("utf-8", errors="replace")
+
+
+def _search_file_bytes(needle: bytes, fold: bool, data: bytes):
+    # Search the whole file at once without decoding it, only matching lines are
+    # decoded (UTF-8 never has ASCII bytes inside multibyte characters)
+    haystack = data.lower() if fold else data
+    find = haystack.find
+    count_newlines = haystack.count
+    line_num = 1
+    counted_until = 0
+    idx = find(needle)
+    while idx >= 0:
+        line_start = haystack.rfind(b"\n", 0, idx) + 1
+        line_end = find(b"\n", idx)
+        if line_end < 0:
+            line_end = len(haystack)
+        line_num += count_newlines(b"\n", counted_until, line_start)
+        counted_until = line_start
+        col = len(data[line_start:idx].decode("utf-8", errors="replace"))
+        line_text = data[line_start:line_end].decode("utf-8", errors="replace")
+        yield line_num, col, line_text
+        idx = find(needle, line_end + 1)
+
+
+def _search_file_text(needle: str, data: bytes):
+    text = _decode_text(data)
+    if needle not in text.lower():
+        return
+    yield from _search_lines(lambda line: line.lower().find(needle), text)
+
+
+def _search_file_regex(regex: re.Pattern, data: bytes):
+    text = _decode_text(data)
+    # Most files have no match at all, rule them out with a single search over
+    # the whole text before matching line by line (multiline mode makes ^ and $
+    # match at line boundaries in both cases)
+    if regex.search(text) is None:
+        return
+
+    def find(line):
+        match = regex.search(line)
+        return match.start() if match else -1
+    yield from _search_lines(find, text)
+
+
+def _search_lines(find, text: str):
+    for line_num, line in enumerate(text.split("\n"), 1):
+        col = find(line)
+        if col >= 0:
+            yield line_num, col, line
 
 
 def mkdir(path: Path) -> Path:
@@ -181,4 +459,4 @@ LOGS_DIR = mkdir(USER_DIR / "logs")
 CACHE_DIR = mkdir(USER_DIR / "cache")
 SETTINGS_DIR = mkdir(USER_DIR / "settings")
 HELP_FILE = USER_DIR / "HELP.md"
-shutil.copy(PROJ_DIR / "positron" / "HELP.md", HELP_FILE)
+file_copy_if_newer(PROJ_DIR / "positron" / "HELP.md", HELP_FILE)
@@ -0,0 +1,28 @@
+"""Fuzzy matching utilities."""
+
+from typing import Optional
+
+
+def fuzzy_match(pattern: str, text: str) -> Optional[tuple[int, int]]:
+    """Find *pattern* as a subsequence of *text* with the fewest characters between.
+
+    Returns the number of characters skipped and where the match starts, or None.
+    """
+    best = None
+    rest = pattern[1:]
+    find = text.find
+    start = find(pattern[0])
+    while start >= 0:
+        end = start + 1
+        for char in rest:
+            end = find(char, end) + 1
+            if not end:
+                # Later starts have even less text to match the rest of the pattern
+                return best
+        skipped = end - start - len(pattern)
+        if best is None or skipped < best[0]:
+            best = skipped, start
+            if not skipped:
+                break
+        start = find(pattern[0], start + 1)
+    return best
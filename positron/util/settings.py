@@ -13,13 +13,10 @@ All settings files are configured using TOML.
 
 
 from loguru import logger
-from typing import Optional, Any, Iterator, Callable, NamedTuple
-import functools
+from typing import Optional, Any, Callable, NamedTuple
 import weakref
-from collections import defaultdict
 from pathlib import Path
-import shutil
-from .file import SETTINGS_DIR, PROJ_DIR, toml_load, file_dump
+from .file import SETTINGS_DIR, PROJ_DIR, toml_load, file_dump, file_copy_if_newer
 
 
 SAMPLE_SETTINGS = """# This is your settings file.
@@ -30,29 +27,31 @@ SAMPLE_SETTINGS = """# This is your settings file.
 
 SETTINGS_FILE = SETTINGS_DIR / "__global__.toml"
 DEFAULT_SETTINGS_FILE = PROJ_DIR / "positron" / "default_settings.toml"
-shutil.copy(DEFAULT_SETTINGS_FILE, SETTINGS_DIR / "__defaults__.toml")
+file_copy_if_newer(DEFAULT_SETTINGS_FILE, SETTINGS_DIR / "__defaults__.toml")
 if not SETTINGS_FILE.exists():
     file_dump(SETTINGS_FILE, SAMPLE_SETTINGS)
 
 
-def _yield_flat_dict(
-    d: dict,
-    path: Optional[list[str]] = None,
-) -> Iterator[tuple[str, Any]]:
-    """Yield a '.' separated path and value in a nested dict."""
-    path = [] if path is None else path
-    for k, v in d.items():
-        assert isinstance(k, str)
-        new_path = [*path, k]
-        if isinstance(v, dict):
-            yield from _yield_flat_dict(v, path=new_path)
-        else:
-            yield ".".join(new_path), v
-
-
 def _flatten_dict(d: dict) -> dict[str, Any]:
-    """Return a flat dict given a nested dict, assuming all keys are strings."""
-    return {path: value for path, value in _yield_flat_dict(d)}
+    """Return a flat dict given a nested dict, assuming all keys are strings.
+
+    Keys of the flat dict are the '.' separated paths in the nested dict.
+    """
+    flat = {}
+    # A stack of partially consumed dicts keeps the original order of the keys
+    stack = [("", iter(d.items()))]
+    while stack:
+        prefix, items = stack[-1]
+        for k, v in items:
+            assert isinstance(k, str)
+            path = f"{prefix}{k}"
+            if isinstance(v, dict):
+                stack.append((f"{path}.", iter(v.items())))
+                break
+            flat[path] = v
+        else:
+            stack.pop()
+    return flat
 
 
 def _load_settings(settings_files: Optional[list[Path]] = None) -> dict[str, Any]:
@@ -114,32 +113,32 @@ class WeakCallableList:
 
     def get_all(self):
         """Get all existing functions."""
-        dead_refs = set()
+        alive = []
         for wc in self._funcs:
             func, bound_ref = wc[0](), wc[1]
+            if func is None:
+                # Function no longer exists
+                continue
             # Normal unbound function
             if bound_ref is None:
-                if func is None:
-                    # Funcion no longer exists
-                    dead_refs.add(wc)
-                    continue
+                alive.append(wc)
                 yield func
+                continue
             # Bound method
-            else:
-                bound_to = bound_ref()  # The "self" or "cls" of the method
-                if bound_to is None:
-                    # Method's bounded instance no longer exists
-                    dead_refs.add(wc)
-                    continue
-                yield functools.partial(func, bound_to)
-        for dead_ref in dead_refs:
-            self._funcs.remove(dead_ref)
+            bound_to = bound_ref()  # The "self" or "cls" of the method
+            if bound_to is None:
+                # Method's bounded instance no longer exists
+                continue
+            alive.append(wc)
+            yield func.__get__(bound_to)
+        # Dead references are dropped in a single pass once all were yielded
+        self._funcs = alive
 
 
 class _Settings:
     _LOADED_NAMES: Optional[tuple[str, ...]] = None
     _SETTINGS: Optional[dict[str, Any]] = None
-    _BINDINGS: dict[str, WeakCallableList] = defaultdict(WeakCallableList)
+    _BINDINGS: dict[str, WeakCallableList] = {}
     _USED_SETTINGS: set[str] = set()
 
     @classmethod
@@ -171,12 +170,13 @@ class _Settings:
     def get(cls, name: str, /) -> Any:
         """Get the value of settings by name."""
         try:
-            cls._USED_SETTINGS.add(name)
-            return cls._SETTINGS[name]
+            value = cls._SETTINGS[name]
         except TypeError:
             raise RuntimeError("Settings uninitialized")
-        except ValueError:
+        except KeyError:
             raise ValueError(f"Unknown setting: {name}")
+        cls._USED_SETTINGS.add(name)
+        return value
 
     @classmethod
     def bind(cls, name: str, callback: SettingsCallback, /) -> Any:
@@ -189,7 +189,10 @@ class _Settings:
         """
         # logger.debug(f"Binding setting {name!r} to {callback=}")
         current_value = cls.get(name)
-        cls._BINDINGS[name].add(callback)
+        bindings = cls._BINDINGS.get(name)
+        if bindings is None:
+            bindings = cls._BINDINGS[name] = WeakCallableList()
+        bindings.add(callback)
         return current_value
 
     @classmethod
@@ -204,11 +207,12 @@ class _Settings:
             new_value = new_settings[name]
             if old_value != new_value:
                 logger.debug(f"Setting {name}: {old_value!r} -> {new_value!r}")
-                callbacks = tuple(cls._BINDINGS[name].get_all())
+                bindings = cls._BINDINGS.get(name)
+                callbacks = tuple(bindings.get_all()) if bindings is not None else ()
                 if not callbacks:
                     logger.debug("No callbacks for settings change.")
                 for func in callbacks:
-                    logger.debug(f"Calling: {func.func} {func.args}")
+                    logger.debug(f"Calling: {func}")
                     func(name, old_value, new_value)
 
     @classmethod
@@ -1,16 +1,16 @@
 """Snippets utilities."""
 
-from typing import Iterable
+import heapq
+from functools import lru_cache
 import shutil
-from itertools import islice
-from dataclasses import dataclass
-import fuzzysearch
-import fuzzysearch.common
+from dataclasses import dataclass, field
 from .file import PROJ_DIR, SETTINGS_DIR, toml_load
+from .fuzzy import fuzzy_match
 
 
 SNIPPETS_FILE = SETTINGS_DIR / "__snippets__.toml"
 MAX_RESULTS = 20
+MAX_SKIPPED_CHARS = 10
 
 
 @dataclass
@@ -24,6 +24,11 @@ class Snippet:
     """Move cursor backwards after inserting text. Set negative to move to beginning."""
     select: int = 0
     """Select text backwards after moving cursor. Set negative to select all."""
+    preview: str = field(init=False, repr=False, compare=False)
+    """Line representing the snippet in completions."""
+
+    def __post_init__(self):
+        self.preview = f"¬ {self.name}"
 
 
 def _load_snippets() -> dict[str, Snippet]:
@@ -34,23 +39,33 @@ def _load_snippets() -> dict[str, Snippet]:
     return {k: Snippet(k, **v) for k, v in user_snippets.items()}
 
 
-SNIPPETS = _load_snippets()
-
-
-def _fuzzy_search(pattern: str, text: str) -> list[fuzzysearch.common.Match]:
-    return fuzzysearch.find_near_matches(
-        pattern,
-        text,
-        max_l_dist=10,
-        max_deletions=0,
-        max_insertions=10,
-        max_substitutions=0,
-    )
+@lru_cache(maxsize=1)
+def _get_snippets() -> tuple[list[Snippet], list[str]]:
+    # Loaded on first use rather than on import. Names are kept separately for
+    # filtering, which never needs the rest of a snippet.
+    snippets = list(_load_snippets().values())
+    return snippets, [s.name for s in snippets]
 
 
-def find_snippets(pattern: str, max_results: int = MAX_RESULTS) -> Iterable[Snippet]:
-    """Snippets matching fuzzy search of pattern."""
+def find_snippets(pattern: str, max_results: int = MAX_RESULTS) -> list[Snippet]:
+    """Snippets matching fuzzy search of pattern, closest matches first."""
+    snippet_list, snippet_names = _get_snippets()
     if not pattern:
-        return list(SNIPPETS.values())
-    filtered_snippets = (s for s in SNIPPETS.values() if _fuzzy_search(pattern, s.name))
-    return islice(filtered_snippets, max_results)
+        return list(snippet_list)
+    matches = []
+    append = matches.append
+    perfect_count = 0
+    pattern_len = len(pattern)
+    for idx, name in enumerate(snippet_names):
+        # Names shorter than the pattern cannot contain it
+        if len(name) < pattern_len:
+            continue
+        match = fuzzy_match(pattern, name)
+        if match is not None and match[0] <= MAX_SKIPPED_CHARS:
+            append((*match, idx))
+            # Nothing can rank before enough prefix matches found earlier
+            if match == (0, 0):
+                perfect_count += 1
+                if perfect_count >= max_results:
+                    break
+    return [snippet_list[m[-1]] for m in heapq.nsmallest(max_results, matches)]
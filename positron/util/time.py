@@ -5,14 +5,14 @@ import time
 import contextlib
 
 
-def ping() -> float:
+def ping() -> int:
     """Generate a time value to be later used by `pong`."""
-    return time.perf_counter() * 1000
+    return time.perf_counter_ns()
 
 
-def pong(ping_: float) -> float:
+def pong(ping_: int) -> float:
     """Return the time delta in ms from a value given by `ping`."""
-    return (time.perf_counter() * 1000) - ping_
+    return (time.perf_counter_ns() - ping_) / 1_000_000
 
 
 @contextlib.contextmanager